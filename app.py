@@ -1,14 +1,25 @@
-from flask import Flask, jsonify, request
+from flask import Flask, request
 from flask_cors import CORS
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin
+import aiohttp
+import asyncio
+from selectolax.lexbor import LexborHTMLParser
+from urllib.parse import urljoin, urlparse
+from html import unescape
 import re
-import json
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import hashlib
+import gzip
+import orjson
+from dataclasses import dataclass, field
 from datetime import datetime
+from email.utils import formatdate
+from operator import attrgetter, itemgetter
 import pytz
+import fcntl
+import queue
+import threading
+import time
 from google.cloud import storage
+from google.api_core.exceptions import NotFound
 import os
 
 app = Flask(__name__)
@@ -19,7 +30,39 @@ DEPARTMENTS = {
     "mech": 5, "mme": 6, "sos": 7, "shm": 8, "civil": 9
 }
 
+@dataclass(slots=True)
+class Entry:
+    """A scraped faculty member, serialized by orjson as a plain JSON object"""
+    id: int
+    department: str
+    name: str
+    title: str
+    image: str
+    email: str | None = None
+    areas_of_interest: str | None = None
+    number: str | None = None
+    # Lowercased once for sorting; orjson skips underscore-prefixed fields
+    _sort_name: str = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        self._sort_name = self.name.lower()
+
+PHONE_RE = re.compile(r"\+\d{1,3}\s*\d{10}|\b\d{10}\b")
+EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+DETAIL_RE = re.compile(
+    f"(?P<email>{EMAIL_RE.pattern})|(?P<phone>{PHONE_RE.pattern})|(?P<aoi>(?i:AREAS\\s+OF\\s+INTEREST))"
+)
+MARKUP_RE = re.compile(r"<(script|style)\b.*?</\1\s*>|<[^>]*>", re.IGNORECASE | re.DOTALL)
+# URLs and link labels stripped from the areas of interest in a single pass
+CLEAN_RE = re.compile(r"https?://\S+|EXTERNAL\s*LINK\s*:?|PERSONAL\s*WEB\s*PAGE\s*:?", re.IGNORECASE)
+
 GCS_BUCKET = os.environ.get('GCS_BUCKET', 'faculty-cache-api')
+CACHE_TTL = int(os.environ.get('CACHE_TTL', '60'))
+
+# (faculty, timestamp, body, gzipped body, etag, loaded_at) snapshot, always replaced as a whole so
+# request threads read it with a single reference lookup and no lock
+_CACHE = None
+_CACHE_LOCK = threading.Lock()
 
 def get_gcs_client():
     return storage.Client()
@@ -31,7 +74,7 @@ def save_cache(data, timestamp):
         bucket = client.bucket(GCS_BUCKET)
         blob = bucket.blob("faculty_cache.json")
         cache_data = {'faculty': data, 'timestamp': timestamp}
-        blob.upload_from_string(json.dumps(cache_data))
+        blob.upload_from_string(orjson.dumps(cache_data), content_type="application/json")
         print(f"Cache saved successfully at {timestamp}")
     except Exception as e:
         print(f"Error saving cache: {e}")
@@ -42,128 +85,519 @@ def load_cache():
         client = get_gcs_client()
         bucket = client.bucket(GCS_BUCKET)
         blob = bucket.blob("faculty_cache.json")
-        if blob.exists():
-            cache_data = json.loads(blob.download_as_string())
-            return cache_data.get('faculty', []), cache_data.get('timestamp', '')
+        # Download directly instead of an exists() round trip first
+        cache_data = orjson.loads(blob.download_as_bytes())
+        return cache_data.get('faculty', []), cache_data.get('timestamp', '')
+    except NotFound:
         return [], ''
     except Exception as e:
         print(f"Error loading cache: {e}")
         return [], ''
 
+def build_faculty_body(data, timestamp):
+    """Serialize the /api/faculty response once per cache update"""
+    if data:
+        payload = {
+            "status": "success",
+            "data": data,
+            "count": len(data),
+            "source": "cache",
+            "last_refreshed": timestamp if timestamp else get_current_timestamp()
+        }
+    else:
+        payload = {
+            "status": "no_data",
+            "data": [],
+            "count": 0,
+            "message": "No cached data. Click refresh first!",
+            "source": "cache",
+            "last_refreshed": ""
+        }
+    return orjson.dumps(payload)
+
+def set_cached_faculty(data, timestamp):
+    """Publish a new in-process snapshot of the faculty cache"""
+    global _CACHE
+    body = build_faculty_body(data, timestamp)
+    etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+    _CACHE = (data, timestamp, body, gzip.compress(body, compresslevel=9), etag, time.monotonic())
+
+def get_cached_faculty():
+    """Return the in-process faculty snapshot, reloading it from GCS once it is stale"""
+    snapshot = _CACHE
+    if snapshot is not None and time.monotonic() - snapshot[-1] < CACHE_TTL:
+        return snapshot[:-1]
+    
+    with _CACHE_LOCK:
+        # Another thread may have reloaded while we waited for the lock
+        snapshot = _CACHE
+        if snapshot is None or time.monotonic() - snapshot[-1] >= CACHE_TTL:
+            data, timestamp = load_cache()
+            if not data and snapshot is not None:
+                # Keep serving the last good copy if GCS is empty or unreachable
+                data, timestamp = snapshot[0], snapshot[1]
+            set_cached_faculty(data, timestamp)
+            snapshot = _CACHE
+    return snapshot[:-1]
+
+def json_response(payload, status=200):
+    """Serialize a response body with orjson instead of Flask's stdlib encoder"""
+    return app.response_class(orjson.dumps(payload), status=status, mimetype="application/json")
+
 def get_current_timestamp():
     """Get current timestamp in Indian Standard Time (IST)"""
     ist = pytz.timezone('Asia/Kolkata')
     return datetime.now(ist).strftime("%Y-%m-%d %H:%M:%S IST")
 
-session = requests.Session()
-session.headers.update({"User-Agent": "Mozilla/5.0"})
+SITE_HOSTS = ("nitandhra.ac.in", "www.nitandhra.ac.in")
+NON_PAGE_PREFIXES = ("#", "mailto:", "tel:", "javascript:")
+
+LIST_TIMEOUT = aiohttp.ClientTimeout(total=8, sock_connect=3)
+DETAIL_TIMEOUT = aiohttp.ClientTimeout(sock_connect=2, sock_read=3)
+RETRY_STATUSES = (502, 503, 504)
+MAX_RETRIES = 2
+RETRY_BACKOFF = 0.2
+# Detail pages share this many in-flight fetches across all departments; the
+# connection pool keeps one slot per department on top so listing pages never
+# queue behind another department's detail fan-out
+DETAIL_CONCURRENCY = 20
+
+# Fetched pages are kept on disk (tmpfs on Cloud Run) so conditional GETs and
+# the detail-page TTL survive worker restarts and are shared between workers
+PAGE_CACHE_DIR = os.environ.get('PAGE_CACHE_DIR', '/tmp/scrape_cache')
+PAGE_CACHE_TTL = int(os.environ.get('PAGE_CACHE_TTL', str(24 * 60 * 60)))
+# Cached page files and the temp files of interrupted writes; nothing else in
+# PAGE_CACHE_DIR is pruned
+PAGE_FILE_RE = re.compile(r"[0-9a-f]{40}\.json(?:\.\d+\.\d+\.tmp)?")
+# url -> (blake2b digest of the page, (email, number, areas_of_interest))
+DETAIL_CACHE = {}
+
+def make_session():
+    """Create the HTTP session shared by every fetch of a scrape run"""
+    connector = aiohttp.TCPConnector(
+        limit=50, limit_per_host=DETAIL_CONCURRENCY + len(DEPARTMENTS),
+        ttl_dns_cache=300, keepalive_timeout=30
+    )
+    headers = {
+        "User-Agent": "Mozilla/5.0",
+        "Connection": "keep-alive",
+        "Accept-Encoding": "gzip, deflate, br"
+    }
+    return aiohttp.ClientSession(connector=connector, headers=headers)
 
-def fetch(url, timeout=(4, 8)):
-    """Fetch URL content with error handling"""
+def page_cache_path(url):
+    return os.path.join(PAGE_CACHE_DIR, hashlib.sha1(url.encode()).hexdigest() + ".json")
+
+def cache_get(url):
+    """Return (etag, last_modified, html, mtime, final_url) of the cached copy of url, or None"""
     try:
-        r = session.get(url, timeout=timeout, allow_redirects=True)
-        r.raise_for_status()
-        return r.text
-    except Exception as e:
-        print(f"Error fetching {url}: {e}")
+        with open(page_cache_path(url), "rb") as f:
+            cached = orjson.loads(f.read())
+            mtime = os.fstat(f.fileno()).st_mtime
+        return cached["etag"], cached["last_modified"], cached["html"], mtime, cached.get("url", url)
+    except (OSError, ValueError, KeyError):
+        return None
+
+def cache_put(url, etag, last_modified, html, final_url):
+    """Write the cached copy of url, replacing any previous one atomically"""
+    path = page_cache_path(url)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(PAGE_CACHE_DIR, exist_ok=True)
+        with open(tmp, "wb") as f:
+            f.write(orjson.dumps({"etag": etag, "last_modified": last_modified, "html": html, "url": final_url}))
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"Error caching {url}: {e}")
+
+def prune_page_cache():
+    """Delete cached pages older than PAGE_CACHE_TTL, once a refresh has run
+    
+    A refresh refetches or revalidates every linked page past the TTL, which
+    resets its mtime, so what is still that old belongs to profiles no longer
+    linked, or to a page whose fetch failed and is simply fetched in full next
+    time. On Cloud Run /tmp is held in memory, so the directory must not grow
+    without bound.
+    """
+    cutoff = time.time() - PAGE_CACHE_TTL
+    try:
+        entries = list(os.scandir(PAGE_CACHE_DIR))
+    except OSError:
+        return
+    for entry in entries:
+        if not PAGE_FILE_RE.fullmatch(entry.name):
+            continue
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except OSError:
+            pass
+
+def cache_touch(url):
+    """Restart the TTL of a cached copy the server confirmed is unchanged"""
+    try:
+        os.utime(page_cache_path(url))
+    except OSError:
+        pass
+
+async def fetch(session, url, timeout=LIST_TIMEOUT, max_age=None):
+    """Fetch URL content, or None on failure"""
+    text, _ = await fetch_page(session, url, timeout, max_age)
+    return text
+
+async def fetch_page(session, url, timeout=LIST_TIMEOUT, max_age=None):
+    """Fetch URL content, retrying gateway errors, timeouts and dropped connections
+    
+    Returns (text, final_url), final_url being where redirects ended up, so
+    relative links resolve the way a browser would resolve them. Pages cached
+    less than max_age seconds ago are returned without a request; older
+    copies are revalidated with a conditional GET.
+    """
+    cached = cache_get(url)
+    headers = {}
+    if cached:
+        etag, last_modified, html, mtime, final_url = cached
+        if max_age is not None and time.time() - mtime < max_age:
+            return html, final_url
+        if etag:
+            headers["If-None-Match"] = etag
+        headers["If-Modified-Since"] = last_modified or formatdate(mtime, usegmt=True)
+    
+    for attempt in range(MAX_RETRIES + 1):
+        if attempt:
+            await asyncio.sleep(RETRY_BACKOFF * 2 ** (attempt - 1))
+        try:
+            async with session.get(url, headers=headers, timeout=timeout, allow_redirects=True) as r:
+                if r.status == 304 and cached:
+                    cache_touch(url)
+                    return cached[2], cached[4]
+                if r.status in RETRY_STATUSES and attempt < MAX_RETRIES:
+                    continue
+                r.raise_for_status()
+                # Decode with the declared charset, or UTF-8, never via charset sniffing
+                try:
+                    text = await r.text(encoding=r.charset or "utf-8", errors="replace")
+                except LookupError:
+                    # Content-Type named a charset Python doesn't know
+                    text = await r.text(encoding="utf-8", errors="replace")
+                final_url = str(r.url)
+                cache_put(url, r.headers.get("ETag"), r.headers.get("Last-Modified"), text, final_url)
+                return text, final_url
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            if attempt < MAX_RETRIES:
+                continue
+            print(f"Error fetching {url}: {e!r}")
+            return None, url
+        except aiohttp.ClientError as e:
+            print(f"Error fetching {url}: {e}")
+            return None, url
+
+def scan_detail_text(text):
+    """Return the first email, the first phone number and whether the AOI label occurs, in one regex pass"""
+    found = {}
+    for m in DETAIL_RE.finditer(text):
+        found.setdefault(m.lastgroup, m.group(0).strip())
+        if len(found) == 3:
+            break
+    return found.get("email"), found.get("phone"), "aoi" in found
+
+def find_aoi_label(node):
+    """Return the first <b> under node whose text mentions areas of interest, or None"""
+    # Matched in Python: the pinned selectolax cannot parse :lexbor-contains
+    for b in node.css("b"):
+        if "areas of interest" in b.text().lower():
+            return b
+    return None
+
+def extract_aoi(node):
+    """Return the cleaned areas of interest text listed under node, or None"""
+    aoi_block = find_aoi_label(node)
+    if aoi_block is None:
         return None
+    # Collect what follows the label up to the next bold label, without
+    # re-rendering the label itself
+    parts = []
+    sibling = aoi_block.next
+    while sibling is not None and sibling.tag != "b":
+        text = sibling.text(separator=" ", strip=True)
+        if text:
+            parts.append(text)
+        sibling = sibling.next
+    if parts:
+        aoi_text = " ".join(parts)
+    else:
+        # Label wrapped in another inline tag: fall back to the whole parent block
+        aoi_text = aoi_block.parent.text(separator=" ", strip=True)
+        aoi_text = aoi_text.replace(aoi_block.text(strip=True), "")
+    aoi_text = CLEAN_RE.sub("", aoi_text).strip(" :")
+    return aoi_text or None
+
+def parse_detail(sub_html):
+    """Extract contact details and areas of interest from a faculty detail page"""
+    # Extract email and phone number from the tag-stripped markup, no DOM needed;
+    # the same scan reports whether the AOI label is present at all
+    text = unescape(MARKUP_RE.sub(" ", sub_html))
+    email, number, has_aoi = scan_detail_text(text)
+    areas_of_interest = None
+    
+    # Only pages that carry the label are worth parsing
+    if not has_aoi:
+        return email, number, areas_of_interest
+    
+    # A page whose AOI block can't be read still yields its contacts
+    try:
+        areas_of_interest = extract_aoi(LexborHTMLParser(sub_html))
+    except Exception as e:
+        print(f"Error extracting areas of interest: {e}")
+    return email, number, areas_of_interest
+
+async def scrape_detail(session, sem, entry, url):
+    """Fill contact details and areas of interest from a faculty detail page"""
+    # One bad page costs only this entry's details, never the department
+    try:
+        async with sem:
+            sub_html = await fetch(session, url, timeout=DETAIL_TIMEOUT, max_age=PAGE_CACHE_TTL)
+    except Exception as e:
+        print(f"Error scraping faculty detail for {entry.name}: {e}")
+        return
+    if not sub_html:
+        return
+    
+    # Unchanged pages reuse the fields parsed on a previous refresh
+    digest = hashlib.blake2b(sub_html.encode(), digest_size=16).digest()
+    cached = DETAIL_CACHE.get(url)
+    if cached is not None and cached[0] == digest:
+        fields = cached[1]
+    else:
+        try:
+            fields = parse_detail(sub_html)
+        except Exception as e:
+            print(f"Error scraping faculty detail for {entry.name}: {e}")
+            return
+        DETAIL_CACHE[url] = (digest, fields)
+    
+    # Values already found on the listing card take precedence
+    email, number, areas_of_interest = fields
+    entry.email = entry.email or email
+    entry.number = entry.number or number
+    entry.areas_of_interest = entry.areas_of_interest or areas_of_interest
+
+def extract_card(card):
+    """Return the first img, the media-heading h5, the last h5 and the first link of a card"""
+    img = name_tag = last_h5 = link = None
+    # One selector-list query walks the card once and yields nodes in document order
+    for node in card.css("img, h5, a"):
+        tag = node.tag
+        if tag == "h5":
+            if name_tag is None and "media-heading" in (node.attributes.get("class") or "").split():
+                name_tag = node
+            last_h5 = node
+        elif tag == "img":
+            if img is None:
+                img = node
+        elif link is None:
+            link = node
+    return img, name_tag, last_h5, link
 
-def scrape_department(dept, id_):
+async def scrape_department(session, sem, dept, id_):
     """Scrape faculty data from a specific department"""
     out = []
-    phone_pattern = re.compile(r"\+\d{1,3}\s*\d{10}|\b\d{10}\b")
-    email_pattern = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
-    url_cleaner = re.compile(r"https?://\S+")
-    remove_labels = [r"EXTERNAL\s*LINK\s*:?", r"PERSONAL\s*WEB\s*PAGE\s*:?"]
     
     fac_url = f"https://nitandhra.ac.in/dept/{dept}/faculty"
-    html = fetch(fac_url)
+    # The listing may redirect (e.g. to a trailing-slash URL); relative
+    # profile links are resolved against wherever it actually ended up
+    html, base_url = await fetch_page(session, fac_url)
     
     if not html:
         print(f"Failed to fetch {dept} department")
         return out
     
-    soup = BeautifulSoup(html, "html.parser")
-    cards = soup.find_all("div", class_="well")
+    tree = LexborHTMLParser(html)
+    cards = tree.css("div.well")
+    pending = []
     
     for card in cards:
-        img = card.find("img")
-        name_tag = card.find("h5", class_="media-heading")
-        all_h5 = card.find_all("h5")
+        img, name_tag, last_h5, link = extract_card(card)
         
-        if not img or not name_tag or not all_h5:
+        if img is None or name_tag is None:
             continue
         
-        entry = {
-            "id": id_,
-            "department": dept,
-            "name": name_tag.get_text(strip=True),
-            "title": all_h5[-1].get_text(strip=True),
-            "image": img.get("src", ""),
-            "email": None,
-            "areas_of_interest": None,
-            "number": None
-        }
+        entry = Entry(
+            id_,
+            dept,
+            name_tag.text(strip=True),
+            last_h5.text(strip=True),
+            img.attributes.get("src") or ""
+        )
+        out.append(entry)
         
-        link = card.find("a")
-        if link and link.get("href"):
-            full = urljoin(fac_url, link["href"])
-            try:
-                sub_html = fetch(full, timeout=(2, 3))
-                if sub_html:
-                    sub = BeautifulSoup(sub_html, "html.parser")
-                    text = sub.get_text(" ", strip=True)
-                    
-                    # Extract phone number
-                    phone_match = phone_pattern.findall(text)
-                    if phone_match:
-                        entry["number"] = phone_match[0].strip()
-                    
-                    # Extract email
-                    email_match = email_pattern.findall(text)
-                    if email_match:
-                        entry["email"] = email_match[0].strip()
-                    
-                    # Extract areas of interest
-                    aoi_block = sub.find("b", string=lambda x: x and "AREAS OF INTEREST" in x.upper())
-                    if aoi_block:
-                        aoi_text = aoi_block.parent.get_text(" ", strip=True)
-                        aoi_text = aoi_text.replace(aoi_block.get_text(strip=True), "")
-                        aoi_text = aoi_text.strip(" :")
-                        aoi_text = url_cleaner.sub("", aoi_text).strip()
-                        for pattern in remove_labels:
-                            aoi_text = re.sub(pattern, "", aoi_text, flags=re.IGNORECASE)
-                        entry["areas_of_interest"] = aoi_text.strip() if aoi_text.strip() else None
-            except Exception as e:
-                print(f"Error scraping faculty detail for {entry['name']}: {e}")
+        # Use whatever the card itself shows before paying for a detail page
+        entry.email, entry.number, has_aoi = scan_detail_text(card.text(separator=" ", strip=True))
+        if has_aoi:
+            entry.areas_of_interest = extract_aoi(card)
+        # The detail page is skipped only if it has nothing left to add
+        if None not in (entry.email, entry.number, entry.areas_of_interest):
+            continue
         
-        out.append(entry)
+        href = link.attributes.get("href") if link is not None else None
+        if not href or href.lower().startswith(NON_PAGE_PREFIXES):
+            continue
+        # Profiles hosted elsewhere only burn the detail timeout
+        url = urljoin(base_url, href)
+        if urlparse(url).hostname in SITE_HOSTS:
+            pending.append((entry, url))
+    
+    # Fetch and parse every detail page of the department concurrently
+    await asyncio.gather(*(scrape_detail(session, sem, entry, url) for entry, url in pending))
     
+    # Sort by name on the key precomputed when each entry was built
+    out.sort(key=attrgetter("_sort_name"))
     return out
 
-def scrape_all():
-    """Scrape faculty data from all departments using parallel execution"""
-    all_faculty = []
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        futures = {
-            executor.submit(scrape_department, dept, id_): dept 
-            for dept, id_ in DEPARTMENTS.items()
-        }
-        for future in as_completed(futures):
-            try:
-                faculty_list = future.result()
-                all_faculty.extend(faculty_list)
-            except Exception as e:
-                print(f"Error in scrape_all: {e}")
+async def scrape_all_async(on_department=None):
+    """Scrape faculty data from all departments on a single event loop
+    
+    on_department, if given, is called with (id, entries) as each department finishes.
+    """
+    # gather returns results in submission order, so submitting departments by ID
+    # yields them already sorted by ID and only names need sorting within each one
+    departments = sorted(DEPARTMENTS.items(), key=itemgetter(1))
+    
+    async def scrape_one(session, sem, dept, id_):
+        try:
+            entries = await scrape_department(session, sem, dept, id_)
+        except Exception as e:
+            print(f"Error in scrape_all: {e}")
+            entries = []
+        if on_department is not None:
+            on_department(id_, entries)
+        return entries
+    
+    sem = asyncio.Semaphore(DETAIL_CONCURRENCY)
+    async with make_session() as session:
+        results = await asyncio.gather(
+            *(scrape_one(session, sem, dept, id_) for dept, id_ in departments)
+        )
+    return [entry for entries in results for entry in entries]
+
+def scrape_all(on_department=None):
+    """Scrape faculty data from all departments"""
+    return asyncio.run(scrape_all_async(on_department))
+
+def refresh_cache(on_department=None):
+    """Scrape live data, save it to GCS and publish it to this process"""
+    data = scrape_all(on_department)
+    prune_page_cache()
+    if not data:
+        # Keep the last good copy rather than publishing an empty directory
+        raise RuntimeError("Scrape returned no faculty")
+    current_time = get_current_timestamp()
+    save_cache(data, current_time)
+    set_cached_faculty(data, current_time)
+    return data, current_time
+
+def try_lock_refresh():
+    """Return the held refresh lock file, or None if a refresh is already running
+    
+    The lock lives in PAGE_CACHE_DIR, so every gunicorn worker in the container
+    shares it; the kernel drops it if the holding worker dies mid-scrape.
+    """
+    os.makedirs(PAGE_CACHE_DIR, exist_ok=True)
+    lock = open(os.path.join(PAGE_CACHE_DIR, "refresh.lock"), "a")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock.close()
+        return None
+    return lock
+
+def refresh_status_path():
+    return os.path.join(PAGE_CACHE_DIR, "refresh_status.json")
+
+def write_refresh_status(last_error):
+    """Record how the last refresh ended, for pollers on any worker"""
+    path = refresh_status_path()
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(orjson.dumps({"last_error": last_error, "finished_at": get_current_timestamp()}))
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"Error recording refresh status: {e}")
+
+def read_refresh_status():
+    """Return the outcome recorded by the last refresh, or an empty one"""
+    try:
+        with open(refresh_status_path(), "rb") as f:
+            return orjson.loads(f.read())
+    except (OSError, ValueError):
+        return {"last_error": None, "finished_at": ""}
+
+def run_refresh(lock, on_department=None):
+    """Refresh the cache holding lock, record the outcome, then release the lock
     
-    # Sort by department ID and name
-    all_faculty.sort(key=lambda x: (x["id"], x["name"].lower()))
-    return all_faculty
+    Returns the new last_refreshed timestamp, or None if the refresh failed.
+    The outcome is written before the lock is released, so a poller that sees
+    no refresh running always reads the status of the one that just ended.
+    """
+    last_error = None
+    try:
+        _, current_time = refresh_cache(on_department)
+        return current_time
+    except Exception as e:
+        print(f"Error in refresh_faculty: {e}")
+        last_error = str(e) or type(e).__name__
+        return None
+    finally:
+        write_refresh_status(last_error)
+        lock.close()
+
+def stream_refresh(lock):
+    """Start a refresh holding lock and return a generator of its response body
+    
+    The body is yielded department by department, in department order. The
+    scrape starts right away, so the lock is released even if the client
+    never reads the response.
+    """
+    events = queue.Queue()
+    
+    def worker():
+        current_time = run_refresh(lock, lambda id_, entries: events.put((id_, entries)))
+        events.put((None, current_time))
+    
+    threading.Thread(target=worker, daemon=True).start()
+    
+    def body():
+        ids = sorted(DEPARTMENTS.values())
+        ready = {}
+        position = 0
+        count = 0
+        yield b'{"source":"scrape","data":['
+        while True:
+            id_, payload = events.get()
+            if id_ is None:
+                break
+            ready[id_] = payload
+            # Emit every department whose predecessors have all been emitted
+            while position < len(ids) and ids[position] in ready:
+                entries = ready.pop(ids[position])
+                position += 1
+                if entries:
+                    yield (b"," if count else b"") + b",".join(orjson.dumps(e) for e in entries)
+                    count += len(entries)
+        
+        if payload is None:
+            tail = {"count": count, "status": "error", "message": "Refresh failed", "last_refreshed": ""}
+        else:
+            tail = {"count": count, "status": "success", "last_refreshed": payload}
+        yield b"]," + orjson.dumps(tail)[1:]
+    
+    return body()
 
 @app.get("/")
 def root():
     """Health check endpoint"""
-    return jsonify({
+    return json_response({
         "status": "online", 
         "message": "Faculty Scraper API - Google Cloud Run",
         "timestamp": get_current_timestamp()
@@ -172,56 +606,57 @@ def root():
 @app.get("/api/faculty")
 def get_faculty():
     """Get cached faculty data"""
-    faculty_data, cached_timestamp = load_cache()
-    
-    if faculty_data:
-        return jsonify({
-            "status": "success",
-            "data": faculty_data,
-            "count": len(faculty_data),
-            "source": "cache",
-            "last_refreshed": cached_timestamp if cached_timestamp else get_current_timestamp()
-        })
+    _, _, body, body_gz, etag = get_cached_faculty()
+    if "gzip" in request.headers.get("Accept-Encoding", ""):
+        response = app.response_class(body_gz, mimetype="application/json")
+        response.headers["Content-Encoding"] = "gzip"
     else:
-        return jsonify({
-            "status": "no_data",
-            "data": [],
-            "count": 0,
-            "message": "No cached data. Click refresh first!",
-            "source": "cache",
-            "last_refreshed": ""
-        })
+        response = app.response_class(body, mimetype="application/json")
+    response.headers["Vary"] = "Accept-Encoding"
+    response.headers["Cache-Control"] = f"public, max-age={CACHE_TTL}"
+    # Weak, since the plain and gzipped bodies share it; unchanged caches get a bare 304
+    response.set_etag(etag, weak=True)
+    return response.make_conditional(request)
 
 @app.post("/api/faculty/refresh")
 def refresh_faculty():
-    """Scrape live data and update cache"""
-    try:
+    """Start a live scrape in the background and return immediately"""
+    # Read before starting, so clients compare against the pre-refresh timestamp
+    _, cached_timestamp, _, _, _ = get_cached_faculty()
+    # Held until the scrape finishes; clicks meanwhile, streamed or not and on
+    # any worker, join the running scrape instead of starting another
+    lock = try_lock_refresh()
+    started = lock is not None
+    if started and request.args.get("stream") == "1":
+        print("Starting streamed faculty data refresh...")
+        return app.response_class(stream_refresh(lock), mimetype="application/json")
+    if started:
         print("Starting faculty data refresh...")
-        data = scrape_all()
-        current_time = get_current_timestamp()
-        save_cache(data, current_time)
-        
-        return jsonify({
-            "status": "success",
-            "data": data,
-            "count": len(data),
-            "source": "live",
-            "last_refreshed": current_time
-        })
-    except Exception as e:
-        print(f"Error in refresh_faculty: {e}")
-        return jsonify({
-            "status": "error",
-            "data": [],
-            "count": 0,
-            "message": str(e),
-            "last_refreshed": ""
-        }), 500
+        threading.Thread(target=run_refresh, args=(lock,), daemon=True).start()
+    
+    return json_response({
+        "status": "started" if started else "in_progress",
+        "message": "Refresh running, poll /api/faculty for the new last_refreshed",
+        "last_refreshed": cached_timestamp
+    }, status=202)
+
+@app.get("/api/faculty/refresh")
+def refresh_status():
+    """Report whether a refresh is running and how the last one ended"""
+    lock = try_lock_refresh()
+    if lock is not None:
+        lock.close()
+    status = read_refresh_status()
+    return json_response({
+        "in_progress": lock is None,
+        "last_error": status.get("last_error"),
+        "finished_at": status.get("finished_at", "")
+    })
 
 @app.get("/api/health")
 def health_check():
     """Detailed health check"""
-    return jsonify({
+    return json_response({
         "status": "online",
         "service": "Faculty Scraper API",
         "region": "asia-south1",
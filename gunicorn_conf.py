@@ -0,0 +1,15 @@
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+
+# Threaded workers: a slow client or an in-progress refresh only occupies one
+# thread, and each thread can drive its own asyncio loop for a scrape
+worker_class = "gthread"
+# Each worker keeps its own in-memory snapshot and only re-reads GCS every
+# CACHE_TTL seconds, so more workers means more polls served stale data after
+# a refresh; threads, not processes, are what this I/O-bound app needs
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+threads = 8
+
+# Let clients and the Cloud Run front end reuse connections between polls
+keepalive = 30
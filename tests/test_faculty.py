@@ -0,0 +1,32 @@
+import gzip
+import json
+
+import app
+
+
+def serve(monkeypatch):
+    monkeypatch.setattr(app, "_CACHE", None)
+    app.set_cached_faculty([app.Entry(0, "ece", "Alpha A", "Professor", "")], "now")
+    return app.app.test_client()
+
+
+def test_get_faculty_gzip_negotiation(monkeypatch):
+    client = serve(monkeypatch)
+
+    plain = client.get("/api/faculty")
+    assert "Content-Encoding" not in plain.headers
+    assert json.loads(plain.get_data())["count"] == 1
+
+    packed = client.get("/api/faculty", headers={"Accept-Encoding": "gzip, br"})
+    assert packed.headers["Content-Encoding"] == "gzip"
+    assert packed.headers["Vary"] == "Accept-Encoding"
+    assert gzip.decompress(packed.get_data()) == plain.get_data()
+
+
+def test_get_faculty_answers_matching_etag_with_empty_304(monkeypatch):
+    client = serve(monkeypatch)
+    etag = client.get("/api/faculty").headers["ETag"]
+
+    response = client.get("/api/faculty", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.get_data() == b""
@@ -0,0 +1,128 @@
+import asyncio
+import os
+import time
+
+import app
+
+
+class FakeResponse:
+    def __init__(self, body=b"", charset=None, status=200, headers=None):
+        self.body = body
+        self.charset = charset
+        self.status = status
+        self.headers = headers or {}
+        self.url = "https://nitandhra.ac.in/page"
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    async def text(self, encoding=None, errors="strict"):
+        return self.body.decode(encoding, errors)
+
+
+class FakeSession:
+    """Serves the given responses in order and records each request's headers"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, headers=None, **kwargs):
+        self.requests.append(dict(headers or {}))
+        return self.responses.pop(0)
+
+
+def test_fetch_falls_back_to_utf8_for_unknown_charset(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "PAGE_CACHE_DIR", str(tmp_path))
+    session = FakeSession(FakeResponse("café".encode(), charset="utf-8lol"))
+    assert asyncio.run(app.fetch(session, "https://nitandhra.ac.in/page")) == "café"
+
+
+def test_scrape_detail_survives_unexpected_errors(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "PAGE_CACHE_DIR", str(tmp_path))
+
+    class BrokenSession:
+        def get(self, url, **kwargs):
+            raise RuntimeError("boom")
+
+    entry = app.Entry(1, "ece", "Zed Z", "Professor", "", email="zed@nitandhra.ac.in")
+
+    async def run():
+        await app.scrape_detail(BrokenSession(), asyncio.Semaphore(1), entry, "https://nitandhra.ac.in/zed")
+
+    asyncio.run(run())
+    assert entry.email == "zed@nitandhra.ac.in"
+    assert entry.areas_of_interest is None
+
+
+def test_prune_page_cache_removes_only_stale_pages(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "PAGE_CACHE_DIR", str(tmp_path))
+    stale = tmp_path / ("a" * 40 + ".json")
+    fresh = tmp_path / ("b" * 40 + ".json")
+    other = tmp_path / "refresh_status.json"
+    for path in (stale, fresh, other):
+        path.write_text("{}")
+    old = time.time() - app.PAGE_CACHE_TTL - 60
+    os.utime(stale, (old, old))
+    os.utime(other, (old, old))
+
+    app.prune_page_cache()
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted([fresh.name, other.name])
+
+
+def test_fetch_revalidates_and_reuses_body_on_304(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "PAGE_CACHE_DIR", str(tmp_path))
+    url = "https://nitandhra.ac.in/page"
+    session = FakeSession(
+        FakeResponse(b"<p>v1</p>", headers={"ETag": '"v1"'}),
+        FakeResponse(status=304),
+    )
+
+    assert asyncio.run(app.fetch(session, url)) == "<p>v1</p>"
+    assert asyncio.run(app.fetch(session, url)) == "<p>v1</p>"
+    assert "If-None-Match" not in session.requests[0]
+    assert session.requests[1]["If-None-Match"] == '"v1"'
+
+
+def test_fetch_within_max_age_skips_the_request(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "PAGE_CACHE_DIR", str(tmp_path))
+    url = "https://nitandhra.ac.in/page"
+    session = FakeSession(FakeResponse(b"<p>v1</p>"))
+
+    assert asyncio.run(app.fetch(session, url)) == "<p>v1</p>"
+    assert asyncio.run(app.fetch(session, url, max_age=60)) == "<p>v1</p>"
+    assert len(session.requests) == 1
+
+
+LISTING_HTML = """
+<div class="well"><img src="a.jpg"><h5 class="media-heading">Alpha A</h5><h5>Professor</h5>
+  <a href="alpha">Profile</a></div>
+<div class="well"><img src="b.jpg"><h5 class="media-heading">Beta B</h5><h5>Professor</h5>
+  <a href="mailto:beta@nitandhra.ac.in">Mail</a></div>
+<div class="well"><img src="c.jpg"><h5 class="media-heading">Gamma C</h5><h5>Professor</h5>
+  <a href="https://scholar.example.org/gamma">Scholar</a></div>
+"""
+
+
+def test_scrape_department_fetches_only_site_detail_pages(monkeypatch):
+    fetched = []
+
+    async def fake_fetch_page(session, url, timeout=None, max_age=None):
+        return LISTING_HTML, "https://nitandhra.ac.in/dept/ece/faculty/"
+
+    async def fake_fetch(session, url, timeout=None, max_age=None):
+        fetched.append(url)
+        return None
+
+    monkeypatch.setattr(app, "fetch_page", fake_fetch_page)
+    monkeypatch.setattr(app, "fetch", fake_fetch)
+    entries = asyncio.run(app.scrape_department(None, asyncio.Semaphore(1), "ece", 4))
+
+    assert [e.name for e in entries] == ["Alpha A", "Beta B", "Gamma C"]
+    assert fetched == ["https://nitandhra.ac.in/dept/ece/faculty/alpha"]
@@ -0,0 +1,43 @@
+from selectolax.lexbor import LexborHTMLParser
+
+import app
+
+
+DETAIL_HTML = """
+<html><body><div class="profile">
+  <p>Email: zed@nitandhra.ac.in</p>
+  <p>Phone: 9876543210</p>
+  <p><b>Publications</b> ignored</p>
+  <p><b>Areas of Interest:</b> Power Systems, Smart Grids</p>
+</div></body></html>
+"""
+
+
+def test_find_aoi_label_matches_case_insensitively():
+    label = app.find_aoi_label(LexborHTMLParser(DETAIL_HTML))
+    assert label is not None
+    assert label.text() == "Areas of Interest:"
+
+
+def test_find_aoi_label_without_label():
+    assert app.find_aoi_label(LexborHTMLParser("<div><b>Publications</b> none</div>")) is None
+
+
+def test_extract_aoi_reads_text_after_label():
+    assert app.extract_aoi(LexborHTMLParser(DETAIL_HTML)) == "Power Systems, Smart Grids"
+
+
+def test_parse_detail_returns_all_fields():
+    assert app.parse_detail(DETAIL_HTML) == (
+        "zed@nitandhra.ac.in",
+        "9876543210",
+        "Power Systems, Smart Grids",
+    )
+
+
+def test_parse_detail_keeps_contacts_when_aoi_fails(monkeypatch):
+    def broken(node):
+        raise ValueError("boom")
+
+    monkeypatch.setattr(app, "find_aoi_label", broken)
+    assert app.parse_detail(DETAIL_HTML) == ("zed@nitandhra.ac.in", "9876543210", None)
@@ -0,0 +1,105 @@
+import json
+import threading
+
+import app
+
+
+def test_refresh_requests_share_one_scrape(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "PAGE_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(app, "get_cached_faculty", lambda: ([], "", b"", b"", ""))
+    release = threading.Event()
+    scrapes = []
+
+    def fake_refresh(on_department=None):
+        scrapes.append(on_department)
+        release.wait(5)
+        return [], "now"
+
+    monkeypatch.setattr(app, "refresh_cache", fake_refresh)
+    client = app.app.test_client()
+
+    first = client.post("/api/faculty/refresh")
+    second = client.post("/api/faculty/refresh")
+    streamed = client.post("/api/faculty/refresh?stream=1")
+    assert first.status_code == second.status_code == streamed.status_code == 202
+    assert first.json["status"] == "started"
+    assert second.json["status"] == streamed.json["status"] == "in_progress"
+    assert len(scrapes) == 1
+
+    release.set()
+    # The lock is free again once the scrape finishes
+    lock = None
+    for _ in range(50):
+        lock = app.try_lock_refresh()
+        if lock is not None:
+            break
+        threading.Event().wait(0.1)
+    assert lock is not None
+    lock.close()
+
+
+def test_failed_refresh_is_reported(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "PAGE_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(app, "scrape_all", lambda on_department=None: [])
+    saved = []
+    monkeypatch.setattr(app, "save_cache", lambda data, timestamp: saved.append(data))
+
+    assert app.run_refresh(app.try_lock_refresh()) is None
+    assert saved == []
+
+    status = app.app.test_client().get("/api/faculty/refresh").json
+    assert status["in_progress"] is False
+    assert status["last_error"] == "Scrape returned no faculty"
+
+
+def test_refresh_status_while_running(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "PAGE_CACHE_DIR", str(tmp_path))
+    lock = app.try_lock_refresh()
+    try:
+        status = app.app.test_client().get("/api/faculty/refresh").json
+    finally:
+        lock.close()
+    assert status["in_progress"] is True
+
+
+def stream(monkeypatch, tmp_path, fake_refresh):
+    monkeypatch.setattr(app, "PAGE_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(app, "get_cached_faculty", lambda: ([], "", b"", b"", ""))
+    monkeypatch.setattr(app, "refresh_cache", fake_refresh)
+    response = app.app.test_client().post("/api/faculty/refresh?stream=1")
+    assert response.status_code == 200
+    return json.loads(response.get_data())
+
+
+def department(id_):
+    return [app.Entry(id_, "dept", f"Name {id_}", "Professor", "")]
+
+
+def test_streamed_refresh_is_valid_json_in_department_order(tmp_path, monkeypatch):
+    ids = sorted(app.DEPARTMENTS.values())
+
+    def fake_refresh(on_department=None):
+        # Departments finish out of order, and one has no faculty
+        for id_ in reversed(ids):
+            on_department(id_, department(id_) if id_ != ids[1] else [])
+        return [], "now"
+
+    body = stream(monkeypatch, tmp_path, fake_refresh)
+    assert [e["id"] for e in body["data"]] == [id_ for id_ in ids if id_ != ids[1]]
+    assert body["count"] == len(ids) - 1
+    assert body["status"] == "success"
+    assert body["last_refreshed"] == "now"
+    assert body["source"] == "scrape"
+
+
+def test_streamed_refresh_error_tail(tmp_path, monkeypatch):
+    def fake_refresh(on_department=None):
+        on_department(1, department(1))
+        on_department(0, department(0))
+        raise RuntimeError("listing unreachable")
+
+    body = stream(monkeypatch, tmp_path, fake_refresh)
+    assert [e["id"] for e in body["data"]] == [0, 1]
+    assert body["count"] == 2
+    assert body["status"] == "error"
+    assert body["last_refreshed"] == ""